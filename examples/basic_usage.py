@@ -41,15 +41,14 @@ async def main():
         # Get device information for the first available device
         if devices and devices[0]['status'] == 'device':
             print(f"\n2. Getting device information for {devices[0]['id']}...")
-            device_info = await adb.get_device_info(devices[0]['id'])
-            
-            # Display some key properties
+            # Key properties to display, fetched together in one shell call
             key_props = [
                 'ro.build.version.release',  # Android version
                 'ro.product.manufacturer',   # Manufacturer
                 'ro.product.model',         # Model name
                 'ro.build.display.id',      # Build ID
             ]
+            device_info = await adb.get_device_props(key_props, devices[0]['id'])
             
             print("   Key device properties:")
             for prop in key_props:
@@ -0,0 +1,38 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled parsers for ADB command output
+
+Optional accelerated versions of the pure-Python parsers in adb_tools.
+The results must stay identical to the fallbacks.
+"""
+
+
+def parse_getprop(str output):
+    """Parse `getprop` output ([key]: [value] lines) into a dict"""
+    cdef dict props = {}
+    cdef Py_ssize_t n = len(output)
+    cdef Py_ssize_t start = 0
+    cdef Py_ssize_t end, sep, key_start, key_end, value_end
+    
+    while start < n:
+        end = output.find('\n', start)
+        if end < 0:
+            end = n
+        
+        sep = output.find(': [', start, end)
+        if sep >= 0:
+            # Same trimming as str.strip('[]') / str.rstrip(']'), by index
+            key_start = start
+            key_end = sep
+            while key_start < key_end and (output[key_start] == '[' or output[key_start] == ']'):
+                key_start += 1
+            while key_end > key_start and (output[key_end - 1] == '[' or output[key_end - 1] == ']'):
+                key_end -= 1
+            value_end = end
+            while value_end > sep + 3 and output[value_end - 1] == ']':
+                value_end -= 1
+            props[output[key_start:key_end]] = output[sep + 3:value_end]
+        
+        start = end + 1
+    
+    return props
@@ -5,11 +5,153 @@ This module provides Python wrappers for ADB commands to interact with
 Android devices.
 """
 
+from __future__ import annotations
+
 import asyncio
+import codecs
+import functools
 import json
 import logging
+import os
+import re
+import shlex
+import shutil
+import stat
+import struct
 import subprocess
-from typing import Dict, List, Optional, Union
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+
+# Marker echoed after every command sent to a persistent shell session; the
+# random suffix keeps command output from being mistaken for it
+_SHELL_END_MARKER = f"__END__{os.urandom(4).hex()}__".encode()
+
+# Marker echoed with the exit code after each command of a batch; random like
+# the end marker so command output cannot forge it
+_BATCH_SEP_MARKER = f"__MCP_SEP_{os.urandom(4).hex()}__"
+_BATCH_SEP_RE = re.compile(_BATCH_SEP_MARKER + r"(\d+)\n?")
+
+# One `adb devices -l` line: <serial> <status> [key:value ...]
+_DEVICE_LINE_RE = re.compile(r'^(\S+)[ \t]+(\S+)(.*)$', re.M)
+
+# Device properties in the tail of an `adb devices -l` line
+_DEVICE_PROPERTY_RE = re.compile(r'(?<!\S)(product|model|device|transport_id|usb):(\S+)')
+
+# Pipe read size used when collecting subprocess output
+_READ_CHUNK_SIZE = 65536
+
+# StreamReader buffer limit for adb pipes and server sockets, bounding any
+# single readline/readuntil on them (asyncio defaults to 64 KiB)
+_STREAM_LIMIT = 8 << 20
+
+# Address of the local adb server, which the adb client itself talks to
+_ADB_SERVER_HOST = "127.0.0.1"
+_ADB_SERVER_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037))
+
+# Largest payload of a SYNC protocol DATA packet
+_SYNC_DATA_MAX = 64 * 1024
+
+# Local file I/O size for SYNC transfers, so each executor round-trip moves
+# many DATA packets' worth of data
+_SYNC_IO_SIZE = 1024 * 1024
+
+# Upper bound on concurrent per-device queries, to avoid overwhelming adbd
+_MAX_CONCURRENT_DEVICE_QUERIES = 8
+
+
+def _py_parse_getprop(output: str) -> Dict[str, str]:
+    """Parse `getprop` output ([key]: [value] lines) into a dict
+    
+    Must return exactly what the Cython `_parsers.parse_getprop` returns.
+    """
+    props = {}
+    for line in output.split('\n'):
+        key, sep, value = line.partition(': [')
+        if sep:
+            props[key.strip('[]')] = value.rstrip(']')
+    return props
+
+
+# Prefer the Cython parser when the extension has been built
+try:
+    from ._parsers import parse_getprop as _parse_getprop
+except ImportError:
+    _parse_getprop = _py_parse_getprop
+
+
+async def _read_stream(stream: Optional[asyncio.StreamReader]) -> bytearray:
+    """Read a subprocess pipe to EOF into a single growing buffer"""
+    buf = bytearray()
+    if stream is None:
+        return buf
+    
+    while True:
+        chunk = await stream.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            return buf
+        buf += chunk
+
+
+async def _read_hex_payload(reader: asyncio.StreamReader) -> bytes:
+    """Read an adb server payload prefixed with its length as 4 hex digits"""
+    length = int(await reader.readexactly(4), 16)
+    return await reader.readexactly(length)
+
+
+def _write_sync_packet(writer: asyncio.StreamWriter, packet_id: bytes,
+                       payload: Union[bytes, memoryview]) -> None:
+    """Write a SYNC protocol packet: 4-byte ID, little-endian length, payload"""
+    writer.write(packet_id + struct.pack("<I", len(payload)))
+    writer.write(payload)
+
+
+# Parsed equivalents of the `devices -l` and `getprop` mock outputs
+_MOCK_DEVICES = (
+    {"id": "mock_device_001", "status": "device", "usb": "1-1",
+     "product": "sdk_gphone64_x86_64", "model": "Android_SDK_built_for_x86_64",
+     "device": "generic_x86_64"},
+    {"id": "mock_device_002", "status": "device", "usb": "1-2",
+     "product": "pixel7", "model": "Pixel_7", "device": "pixel7"},
+)
+
+_MOCK_PROPS = {
+    "ro.build.version.release": "14",
+    "ro.product.manufacturer": "Google",
+    "ro.product.model": "Android SDK built for x86_64",
+    "ro.build.display.id": "UpsideDownCake",
+    "ro.hardware": "ranchu",
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _dev_prefix(device_id: Optional[str]) -> Tuple[str, ...]:
+    """Get the device selection arguments for `device_id`"""
+    return ("-s", device_id) if device_id else ()
+
+
+def _parse_devices(body: str) -> List[Dict[str, str]]:
+    """Parse device lines, as listed by the adb server, into dicts"""
+    devices = []
+    for match in _DEVICE_LINE_RE.finditer(body):
+        device_info = {
+            "id": match.group(1),
+            "status": match.group(2)
+        }
+        device_info.update(_DEVICE_PROPERTY_RE.findall(match.group(3)))
+        devices.append(device_info)
+    return devices
+
+
+def _split_shell_args(args: Sequence[str]) -> Optional[Tuple[Optional[str], str]]:
+    """Match `[-s <id>] shell <command>` arguments, returning (device_id, command)"""
+    device_id = None
+    if len(args) >= 2 and args[0] == "-s":
+        device_id, args = args[1], args[2:]
+    if len(args) == 2 and args[0] == "shell":
+        return device_id, args[1]
+    return None
 
 
 class ADBError(Exception):
@@ -17,56 +159,557 @@ class ADBError(Exception):
     pass
 
 
+# An open adb server connection
+_Conn = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+def _is_open(conn: _Conn) -> bool:
+    """Check that neither side has closed an adb server connection"""
+    reader, writer = conn
+    return not writer.is_closing() and not reader.at_eof()
+
+
+class _AdbConnPool:
+    """Bounded pool of reusable adb server connections
+    
+    At most `maxsize` connections are open at once; acquire() waits for a free
+    one beyond that. A connection goes back to the pool only if the block
+    using it finished without an exception and it is still open.
+    """
+    
+    def __init__(self, opener: Callable[[], Awaitable[_Conn]], maxsize: int):
+        self._opener = opener
+        # Idle connections are stacked above None placeholders for connections
+        # not yet opened, so LIFO order reuses open ones first
+        self._slots: "asyncio.LifoQueue[Optional[_Conn]]" = asyncio.LifoQueue()
+        for _ in range(maxsize):
+            self._slots.put_nowait(None)
+    
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[_Conn]:
+        """Borrow a connection, opening a new one if none is idle"""
+        conn = await self._slots.get()
+        try:
+            if conn is not None and not _is_open(conn):
+                conn[1].close()
+                conn = None
+            if conn is None:
+                conn = await self._opener()
+            yield conn
+        except BaseException:
+            if conn is not None:
+                conn[1].close()
+            self._slots.put_nowait(None)
+            raise
+        
+        if not _is_open(conn):
+            conn[1].close()
+            conn = None
+        self._slots.put_nowait(conn)
+    
+    def close(self) -> None:
+        """Close all idle connections"""
+        count = self._slots.qsize()
+        for _ in range(count):
+            conn = self._slots.get_nowait()
+            if conn is not None:
+                conn[1].close()
+            self._slots.put_nowait(None)
+
+
 class ADBTools:
     """Wrapper class for ADB operations"""
     
-    def __init__(self, adb_path: str = "adb", mock_mode: bool = False):
+    def __init__(self, adb_path: str = "adb", mock_mode: bool = False,
+                 prop_cache_ttl: float = 60.0, max_concurrent_subprocs: int = 8,
+                 command_timeout: float = 30.0):
         self.adb_path = adb_path
         self.mock_mode = mock_mode
+        # Upper bound on a single shell session command, in seconds
+        self.command_timeout = command_timeout
+        # posix_spawn is only used for executables given with a directory
+        self._adb_executable = ADBTools._resolve(adb_path) or adb_path
         self.logger = logging.getLogger(__name__)
         
+        # getprop results, keyed by device ID: (fetch time, properties)
+        self._prop_ttl = prop_cache_ttl
+        self._propcache: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        # Device IDs seen by the last listing; the default device ("") entry
+        # is only trusted while this set stays the same
+        self._connected: Optional[frozenset] = None
+        
+        # Long-lived `adb shell` processes, keyed by device ID ("" = default device)
+        self._shell_sessions: Dict[str, asyncio.subprocess.Process] = {}
+        self._shell_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Bounds adb processes being started or run to completion and adb server
+        # requests in flight, however many operations callers gather at once;
+        # created on first use so it binds to the running event loop
+        self.max_concurrent_subprocs = max_concurrent_subprocs
+        self._subproc_sem: Optional[asyncio.Semaphore] = None
+        
+        # adb server address used for requests that bypass the adb client
+        self.adb_server = (_ADB_SERVER_HOST, _ADB_SERVER_PORT)
+        
+        # Open SYNC protocol connections, keyed by device ID ("" = default device)
+        self._sync_pools: Dict[str, _AdbConnPool] = {}
+        
         # Auto-detect mock mode if ADB is not available
         if not mock_mode:
-            try:
-                result = subprocess.run([adb_path, "version"], capture_output=True, check=True)
+            self.mock_mode = not ADBTools._probe(adb_path)
+            if self.mock_mode:
+                self.logger.info("ADB not found at %s, enabling mock mode", adb_path)
+            else:
                 self.logger.info("ADB found and working")
-            except (FileNotFoundError, subprocess.CalledProcessError) as e:
-                self.mock_mode = True
-                self.logger.info(f"ADB not found ({e}), enabling mock mode")
-                
-    async def _run_command(self, args: List[str]) -> str:
-        """Execute an ADB command asynchronously"""
+    
+    # Shared instances handed out by ADBTools.get()
+    _instances: Dict[Tuple[str, bool, float, int, float], "ADBTools"] = {}
+    
+    @classmethod
+    def get(cls, adb_path: str = "adb", mock_mode: bool = False,
+            prop_cache_ttl: float = 60.0, max_concurrent_subprocs: int = 8,
+            command_timeout: float = 30.0) -> "ADBTools":
+        """Get a shared ADBTools instance for the given settings
+        
+        Reusing the instance keeps its shell sessions and caches across
+        servers. Instances are not thread-safe: they assume a single asyncio
+        event loop, which owns their subprocesses and locks.
+        """
+        key = (adb_path, mock_mode, prop_cache_ttl, max_concurrent_subprocs, command_timeout)
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = cls._instances[key] = cls(*key)
+        return instance
+    
+    def _args(self, device_id: Optional[str], *tail: str) -> Tuple[str, ...]:
+        """Build ADB arguments targeting `device_id` (default device if None)"""
+        return _dev_prefix(device_id) + tail
+    
+    def _subprocess_slot(self) -> asyncio.Semaphore:
+        """Get the semaphore bounding concurrent adb processes and server requests"""
+        if self._subproc_sem is None:
+            self._subproc_sem = asyncio.Semaphore(self.max_concurrent_subprocs)
+        return self._subproc_sem
+    
+    async def _spawn(self, args: Sequence[str], **kwargs) -> asyncio.subprocess.Process:
+        """Start an adb subprocess with the given arguments
+        
+        On Linux, subprocess launches via posix_spawn (vfork semantics)
+        instead of fork+exec when given an absolute executable and
+        close_fds=False; fork copies the page tables of the whole server
+        process. Descriptors Python opens are non-inheritable (PEP 446), so
+        keeping close_fds off does not leak them into adb.
+        """
+        cmd = [self._adb_executable, *args]
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Executing: %s", " ".join(cmd))
+        
+        return await asyncio.create_subprocess_exec(
+            *cmd, close_fds=False, limit=_STREAM_LIMIT, **kwargs
+        )
+    
+    # PATH lookups shared by all instances, keyed by configured adb path
+    _resolved_paths: Dict[str, Optional[str]] = {}
+    
+    @classmethod
+    def _resolve(cls, adb_path: str) -> Optional[str]:
+        """Resolve `adb_path` to an absolute executable path, once per process"""
+        try:
+            return cls._resolved_paths[adb_path]
+        except KeyError:
+            resolved = cls._resolved_paths[adb_path] = shutil.which(adb_path)
+            return resolved
+    
+    # Probe results shared by all instances, keyed by resolved executable path
+    _adb_available_cache: Dict[str, bool] = {}
+    
+    @classmethod
+    def _probe(cls, adb_path: str) -> bool:
+        """Check whether the ADB executable is available and working
+        
+        A PATH lookup rules out missing executables without spawning anything;
+        `adb version` is only run once per resolved path per process.
+        """
+        resolved = cls._resolve(adb_path)
+        if resolved is None:
+            return False
+        
+        available = cls._adb_available_cache.get(resolved)
+        if available is None:
+            try:
+                subprocess.run([resolved, "version"], capture_output=True, check=True)
+                available = True
+            except (OSError, subprocess.CalledProcessError):
+                available = False
+            cls._adb_available_cache[resolved] = available
+        return available
+    
+    async def _run_command(self, args: Sequence[str], discard_stdout: bool = False) -> str:
+        """Execute an ADB command asynchronously
+        
+        With `discard_stdout`, output is sent to /dev/null and an empty string
+        is returned; errors are still reported from stderr.
+        """
         if self.mock_mode:
             return await self._run_mock_command(args)
-            
-        cmd = [self.adb_path] + args
-        self.logger.debug(f"Executing: {' '.join(cmd)}")
         
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+        # Single shell commands can reuse the device's persistent session
+        shell = _split_shell_args(args)
+        if shell is not None and not discard_stdout:
+            return await self._shell_exec(*shell)
             
-            stdout, stderr = await process.communicate()
+        try:
+            async with self._subprocess_slot():
+                process = await self._spawn(
+                    args,
+                    stdout=asyncio.subprocess.DEVNULL if discard_stdout else asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                
+                stdout, stderr = await asyncio.gather(
+                    _read_stream(process.stdout),
+                    _read_stream(process.stderr)
+                )
+                await process.wait()
             
             if process.returncode != 0:
-                error_msg = stderr.decode().strip()
+                error_msg = stderr.decode("utf-8", "replace").strip()
                 raise ADBError(f"ADB command failed: {error_msg}")
                 
-            return stdout.decode().strip()
+            return stdout.decode("utf-8", "replace").strip()
             
         except FileNotFoundError:
             raise ADBError(f"ADB executable not found at: {self.adb_path}")
         except Exception as e:
             raise ADBError(f"Failed to execute ADB command: {str(e)}")
     
-    async def _run_mock_command(self, args: List[str]) -> str:
+    async def _run_command_stream(self, args: Sequence[str]) -> AsyncIterator[bytes]:
+        """Execute an ADB command, yielding stdout in chunks as it arrives
+        
+        Memory use is bounded by the chunk size regardless of output length.
+        The process is killed if the caller stops iterating early.
+        """
+        if self.mock_mode:
+            yield (await self._run_mock_command(args)).encode()
+            return
+        
+        async with self._subprocess_slot():
+            try:
+                process = await self._spawn(
+                    args,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except FileNotFoundError:
+                raise ADBError(f"ADB executable not found at: {self.adb_path}")
+            
+            stderr_task = asyncio.ensure_future(_read_stream(process.stderr))
+            try:
+                while True:
+                    chunk = await process.stdout.read(_READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+                
+                stderr = await stderr_task
+                await process.wait()
+                if process.returncode != 0:
+                    error_msg = stderr.decode("utf-8", "replace").strip()
+                    raise ADBError(f"ADB command failed: {error_msg}")
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                stderr_task.cancel()
+    
+    async def _open_shell_session(self, device_id: Optional[str]) -> asyncio.subprocess.Process:
+        """Start a persistent `adb shell` process reading commands from stdin"""
+        try:
+            async with self._subprocess_slot():
+                return await self._spawn(
+                    self._args(device_id, "shell"),
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT
+                )
+        except FileNotFoundError:
+            raise ADBError(f"ADB executable not found at: {self.adb_path}")
+    
+    async def _shell_exec(self, device_id: Optional[str], command: str) -> str:
+        """Execute a shell command through the device's persistent shell session
+        
+        Raises ADBError if the command exits with a non-zero status.
+        """
+        output, status = await self._shell_run(device_id, command)
+        if status != 0:
+            raise ADBError(f"ADB command failed: {output}")
+        
+        return output
+    
+    async def _shell_run(self, device_id: Optional[str], command: str) -> Tuple[str, int]:
+        """Run a shell command through the device's persistent shell session
+        
+        Each command runs in its own `sh -c` with stdin from /dev/null, so quoting
+        mistakes, stdin reads, `cd` and `export` cannot leak into the session,
+        and is followed by an `echo` of a sentinel marker and the exit code so
+        the response can be framed without closing the session. Returns the
+        output, with stderr interleaved into it, and the exit code.
+        """
+        if self.mock_mode:
+            return await self._run_mock_command(self._args(device_id, "shell", command)), 0
+        
+        key = device_id or ""
+        lock = self._shell_locks.setdefault(key, asyncio.Lock())
+        
+        async with lock:
+            process = self._shell_sessions.get(key)
+            if process is None or process.returncode is not None:
+                process = await self._open_shell_session(device_id)
+                self._shell_sessions[key] = process
+            
+            self.logger.debug("Session executing: %s", command)
+            script = f"sh -c {shlex.quote(command)} </dev/null; echo {_SHELL_END_MARKER.decode()}$?\n"
+            try:
+                process.stdin.write(script.encode())
+                await process.stdin.drain()
+                data, status = await asyncio.wait_for(
+                    self._read_shell_reply(process), self.command_timeout
+                )
+            except BaseException as e:
+                # Unread output would shift every later reply; start over next time
+                self._shell_sessions.pop(key, None)
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise ADBError(f"ADB shell command timed out after {self.command_timeout}s: {command}")
+                if isinstance(e, asyncio.IncompleteReadError):
+                    leftover = e.partial
+                elif isinstance(e, ConnectionError):
+                    # The session died before reading the command; keep what adb
+                    # printed on the way out (e.g. "device 'x' not found")
+                    leftover = await process.stdout.read()
+                else:
+                    raise
+                message = leftover.decode(errors="replace").strip()
+                if message:
+                    raise ADBError(f"ADB command failed: {message}")
+                raise ADBError(f"ADB shell session failed: {str(e)}")
+        
+        return data.decode(errors="replace").strip(), int(status)
+    
+    @staticmethod
+    async def _read_shell_reply(process: asyncio.subprocess.Process) -> Tuple[bytes, bytes]:
+        """Read one framed reply: the output before the marker and the exit code
+        
+        Reads in chunks and searches a rolling window for the marker, so the
+        output size is not bounded by the stream's buffer limit.
+        """
+        buf = bytearray()
+        start = 0
+        marker_at = -1
+        while True:
+            if marker_at < 0:
+                marker_at = buf.find(_SHELL_END_MARKER, start)
+                # The marker may straddle chunks: rescan only the unmatched tail
+                start = max(0, len(buf) - len(_SHELL_END_MARKER) + 1)
+            if marker_at >= 0:
+                eol = buf.find(b"\n", marker_at + len(_SHELL_END_MARKER))
+                if eol >= 0:
+                    return bytes(buf[:marker_at]), bytes(buf[marker_at + len(_SHELL_END_MARKER):eol])
+            
+            chunk = await process.stdout.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                raise asyncio.IncompleteReadError(bytes(buf), None)
+            buf += chunk
+    
+    async def aclose(self) -> None:
+        """Terminate all persistent shell sessions and close idle connections"""
+        for pool in self._sync_pools.values():
+            pool.close()
+        
+        sessions = list(self._shell_sessions.values())
+        self._shell_sessions.clear()
+        
+        for process in sessions:
+            if process.returncode is not None:
+                continue
+            try:
+                process.stdin.close()
+                process.terminate()
+            except ProcessLookupError:
+                continue
+            await process.wait()
+    
+    async def _open_adb_socket(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Connect to the adb server
+        
+        Raises OSError if no server is listening; callers fall back to the adb
+        client, which starts the server on demand.
+        """
+        return await asyncio.open_connection(*self.adb_server, limit=_STREAM_LIMIT)
+    
+    async def _send_adb_request(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter, request: str) -> None:
+        """Send a hex-length-prefixed request to the adb server and check its status"""
+        data = request.encode()
+        writer.write(b"%04x%s" % (len(data), data))
+        await writer.drain()
+        
+        status = await reader.readexactly(4)
+        if status == b"FAIL":
+            message = await _read_hex_payload(reader)
+            raise ADBError(f"ADB command failed: {message.decode('utf-8', 'replace')}")
+        if status != b"OKAY":
+            raise ADBError(f"Unexpected adb server response: {status!r}")
+    
+    async def _host_query(self, request: str) -> str:
+        """Run a `host:` request on the adb server and return its reply"""
+        async with self._subprocess_slot():
+            reader, writer = await self._open_adb_socket()
+            try:
+                await self._send_adb_request(reader, writer, request)
+                return (await _read_hex_payload(reader)).decode("utf-8", "replace")
+            finally:
+                writer.close()
+    
+    async def _open_transport(self, device_id: Optional[str]
+                              ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Connect to the adb server and switch the connection to a device
+        
+        Without a device ID this targets $ANDROID_SERIAL, as the adb client
+        does, and only then whichever single device is connected.
+        """
+        device_id = device_id or os.environ.get("ANDROID_SERIAL")
+        reader, writer = await self._open_adb_socket()
+        try:
+            await self._send_adb_request(
+                reader, writer,
+                f"host:transport:{device_id}" if device_id else "host:transport-any"
+            )
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+    
+    def _sync_pool(self, device_id: Optional[str]) -> _AdbConnPool:
+        """Get the pool of SYNC protocol connections to a device"""
+        key = device_id or ""
+        pool = self._sync_pools.get(key)
+        if pool is None:
+            async def open_sync() -> _Conn:
+                reader, writer = await self._open_transport(device_id)
+                try:
+                    await self._send_adb_request(reader, writer, "sync:")
+                except BaseException:
+                    writer.close()
+                    raise
+                return reader, writer
+            
+            # Every transfer holds a subprocess slot, so more connections than
+            # slots could never be in use at once
+            pool = self._sync_pools[key] = _AdbConnPool(open_sync, self.max_concurrent_subprocs)
+        return pool
+    
+    async def _sync_stat(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                         remote_path: str) -> int:
+        """Get the mode of a remote path over a SYNC connection (0 if missing)"""
+        _write_sync_packet(writer, b"STAT", remote_path.encode())
+        await writer.drain()
+        
+        header = await reader.readexactly(16)
+        if header[:4] != b"STAT":
+            raise ADBError(f"Unexpected sync response: {header[:4]!r}")
+        return struct.unpack("<I", header[4:8])[0]
+    
+    async def _sync_push(self, local_path: str, remote_path: str,
+                         device_id: Optional[str]) -> None:
+        """Send a local file to the device with the adb SYNC protocol"""
+        loop = asyncio.get_running_loop()
+        st = os.stat(local_path)
+        
+        async with self._sync_pool(device_id).acquire() as (reader, writer):
+            # Like `adb push`, copy into a remote directory under the local name.
+            # STAT does not follow symlinks (/sdcard is one); as the adb client
+            # does, stat the path with a trailing slash to resolve the link.
+            mode = await self._sync_stat(reader, writer, remote_path)
+            if stat.S_ISLNK(mode):
+                mode = await self._sync_stat(reader, writer, remote_path.rstrip('/') + '/')
+            if stat.S_ISDIR(mode):
+                remote_path = f"{remote_path.rstrip('/')}/{os.path.basename(local_path)}"
+            
+            spec = f"{remote_path},{st.st_mode}".encode()
+            _write_sync_packet(writer, b"SEND", spec)
+            
+            with open(local_path, "rb") as f:
+                while True:
+                    block = await loop.run_in_executor(None, f.read, _SYNC_IO_SIZE)
+                    if not block:
+                        break
+                    view = memoryview(block)
+                    for offset in range(0, len(view), _SYNC_DATA_MAX):
+                        _write_sync_packet(writer, b"DATA", view[offset:offset + _SYNC_DATA_MAX])
+                    await writer.drain()
+            
+            writer.write(b"DONE" + struct.pack("<I", int(st.st_mtime)))
+            await writer.drain()
+            
+            status = await reader.readexactly(8)
+            if status[:4] != b"OKAY":
+                message = await reader.readexactly(struct.unpack("<I", status[4:])[0])
+                raise ADBError(f"ADB push failed: {message.decode('utf-8', 'replace')}")
+    
+    async def _sync_pull(self, remote_path: str, local_path: str,
+                         device_id: Optional[str]) -> bool:
+        """Receive a file from the device with the adb SYNC protocol
+        
+        Returns False without transferring anything if the remote path is not
+        a regular file (e.g. a directory), which needs the adb client.
+        """
+        loop = asyncio.get_running_loop()
+        if os.path.isdir(local_path):
+            local_path = os.path.join(local_path, os.path.basename(remote_path.rstrip("/")))
+        
+        async with self._sync_pool(device_id).acquire() as (reader, writer):
+            if not stat.S_ISREG(await self._sync_stat(reader, writer, remote_path)):
+                return False
+            
+            _write_sync_packet(writer, b"RECV", remote_path.encode())
+            await writer.drain()
+            
+            with open(local_path, "wb") as f:
+                buf = bytearray()
+                try:
+                    while True:
+                        header = await reader.readexactly(8)
+                        packet_id = header[:4]
+                        length = struct.unpack("<I", header[4:])[0]
+                        if packet_id == b"DONE":
+                            await loop.run_in_executor(None, f.write, buf)
+                            return True
+                        payload = await reader.readexactly(length)
+                        if packet_id == b"DATA":
+                            buf += payload
+                            if len(buf) >= _SYNC_IO_SIZE:
+                                await loop.run_in_executor(None, f.write, buf)
+                                buf = bytearray()
+                        elif packet_id == b"FAIL":
+                            raise ADBError(f"ADB pull failed: {payload.decode('utf-8', 'replace')}")
+                        else:
+                            raise ADBError(f"Unexpected sync response: {packet_id!r}")
+                except BaseException:
+                    # Do not leave a truncated file behind
+                    f.close()
+                    os.unlink(local_path)
+                    raise
+    
+    async def _run_mock_command(self, args: Sequence[str]) -> str:
         """Mock ADB command execution for testing"""
-        self.logger.debug(f"Mock executing: adb {' '.join(args)}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Mock executing: adb %s", " ".join(args))
         
-        if args == ["devices", "-l"]:
+        args = tuple(args)
+        if args == ("devices", "-l"):
             return """List of devices attached
 mock_device_001	device usb:1-1 product:sdk_gphone64_x86_64 model:Android_SDK_built_for_x86_64 device:generic_x86_64
 mock_device_002	device usb:1-2 product:pixel7 model:Pixel_7 device:pixel7"""
@@ -78,7 +721,7 @@ mock_device_002	device usb:1-2 product:pixel7 model:Pixel_7 device:pixel7"""
 [ro.build.display.id]: [UpsideDownCake]
 [ro.hardware]: [ranchu]"""
         
-        elif args[:2] == ["-s", "mock_device_001"] and args[2:] == ["shell", "getprop"]:
+        elif args == ("-s", "mock_device_001", "shell", "getprop"):
             return """[ro.build.version.release]: [14]
 [ro.product.manufacturer]: [Google]
 [ro.product.model]: [Android SDK built for x86_64]
@@ -101,119 +744,325 @@ mock_device_002	device usb:1-2 product:pixel7 model:Pixel_7 device:pixel7"""
         else:
             return f"Mock response for: {' '.join(args)}"
     
+    async def _mock_structured(self, kind: str, device_id: Optional[str] = None
+                               ) -> Union[List[Dict[str, str]], Dict[str, str]]:
+        """Mock results for commands whose parsed form is already known
+        
+        Equivalent to parsing the corresponding _run_mock_command output, but
+        skips the text round-trip.
+        """
+        self.logger.debug("Mock structured: %s %s", kind, device_id or "")
+        
+        if kind == "devices":
+            return [dict(device) for device in _MOCK_DEVICES]
+        
+        elif kind == "getprop":
+            if device_id in (None, "mock_device_001"):
+                return dict(_MOCK_PROPS)
+            return {}
+        
+        raise ValueError(f"No structured mock for: {kind}")
+    
     async def list_devices(self) -> List[Dict[str, str]]:
         """List connected Android devices"""
-        output = await self._run_command(["devices", "-l"])
-        devices = []
-        
-        for line in output.split('\n')[1:]:  # Skip header line
-            if line.strip():
-                parts = line.split()
-                if len(parts) >= 2:
-                    device_id = parts[0]
-                    status = parts[1]
-                    
-                    device_info = {
-                        "id": device_id,
-                        "status": status
-                    }
-                    
-                    # Parse additional device properties
-                    for part in parts[2:]:
-                        if ":" in part:
-                            key, value = part.split(":", 1)
-                            device_info[key] = value
-                    
-                    devices.append(device_info)
+        if self.mock_mode:
+            return await self._mock_structured("devices")
+        
+        try:
+            body = await self._host_query("host:devices-l")
+        except asyncio.IncompleteReadError as e:
+            raise ADBError(f"ADB server closed the connection mid-reply: {str(e)}")
+        except OSError:
+            output = await self._run_command(["devices", "-l"])
+            _, _, body = output.partition('\n')  # Skip header line
         
+        devices = _parse_devices(body)
+        self._prune_propcache(devices)
         return devices
     
-    async def get_device_info(self, device_id: Optional[str] = None) -> Dict[str, str]:
-        """Get detailed information about a device"""
-        cmd_args = []
-        if device_id:
-            cmd_args.extend(["-s", device_id])
-        cmd_args.extend(["shell", "getprop"])
+    def _prune_propcache(self, devices: List[Dict[str, str]]) -> None:
+        """Forget properties of devices that have disconnected
         
-        output = await self._run_command(cmd_args)
-        props = {}
+        The default device's entry is dropped whenever the set of connected
+        devices changes, since it may now resolve to a different device.
+        """
+        connected = frozenset(device["id"] for device in devices)
+        for key in [key for key in self._propcache if key and key not in connected]:
+            del self._propcache[key]
+        if connected != self._connected:
+            self._propcache.pop("", None)
+            self._connected = connected
+    
+    async def watch_devices(self) -> AsyncIterator[List[Dict[str, str]]]:
+        """Yield the list of connected devices each time it changes
+        
+        The first list is the current state. Updates are pushed by the adb
+        server over a single `host:track-devices` connection, so no polling is
+        involved. Raises OSError if the adb server is not running, and
+        ADBError if it goes away while watching.
+        """
+        if self.mock_mode:
+            yield await self._mock_structured("devices")
+            return
+        
+        reader, writer = await self._open_adb_socket()
+        try:
+            await self._send_adb_request(reader, writer, "host:track-devices")
+            while True:
+                try:
+                    payload = await _read_hex_payload(reader)
+                except asyncio.IncompleteReadError as e:
+                    raise ADBError(f"ADB server closed the connection mid-reply: {str(e)}")
+                devices = _parse_devices(payload.decode("utf-8", "replace"))
+                self._prune_propcache(devices)
+                yield devices
+        finally:
+            writer.close()
+    
+    async def list_devices_with_info(self) -> List[Dict[str, Union[str, Dict[str, str]]]]:
+        """List connected devices along with their properties
+        
+        `getprop` is queried concurrently for every online device. Devices that
+        are not online are returned without an "info" entry; failures are
+        reported per device under "error".
+        """
+        devices = await self.list_devices()
+        online = [d for d in devices if d["status"] == "device"]
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_DEVICE_QUERIES)
+        
+        async def fetch_info(device_id: str) -> Dict[str, str]:
+            async with semaphore:
+                return await self.get_device_info(device_id)
         
-        for line in output.split('\n'):
-            if ': [' in line:
-                # Parse property format: [key]: [value]
-                parts = line.split(': [', 1)
-                if len(parts) == 2:
-                    key = parts[0].strip('[]')
-                    value = parts[1].rstrip(']')
-                    props[key] = value
+        infos = await asyncio.gather(
+            *[fetch_info(d["id"]) for d in online],
+            return_exceptions=True
+        )
         
+        for device, info in zip(online, infos):
+            if isinstance(info, Exception):
+                device["error"] = str(info)
+            else:
+                device["info"] = info
+        
+        return devices
+    
+    async def get_device_info(self, device_id: Optional[str] = None,
+                              refresh: bool = False) -> Dict[str, str]:
+        """Get detailed information about a device
+        
+        Results are cached per device for `prop_cache_ttl` seconds, or until
+        the device is no longer listed by `list_devices`. Pass `refresh` to
+        bypass the cache.
+        """
+        if self.mock_mode:
+            return await self._mock_structured("getprop", device_id)
+        
+        cache_key = device_id or ""
+        cached = self._propcache.get(cache_key)
+        if cached and not refresh and time.monotonic() - cached[0] < self._prop_ttl:
+            return dict(cached[1])
+        
+        output = await self._shell_exec(device_id, "getprop")
+        props = _parse_getprop(output)
+        
+        self._propcache[cache_key] = (time.monotonic(), props)
+        return dict(props)
+    
+    async def get_device_props(self, keys: List[str],
+                               device_id: Optional[str] = None) -> Dict[str, str]:
+        """Get selected properties of a device
+        
+        Only the requested keys are queried, all in a single shell round-trip,
+        unless cached `get_device_info` results can answer instead. Properties
+        that are unset on the device are omitted.
+        """
+        cached = self._propcache.get(device_id or "")
+        if self.mock_mode or (cached and time.monotonic() - cached[0] < self._prop_ttl):
+            info = await self.get_device_info(device_id)
+            return {key: info[key] for key in keys if info.get(key)}
+        
+        if not keys:
+            return {}
+        
+        script = "; ".join(
+            f'echo {key}="$(getprop {key})"' for key in map(shlex.quote, keys)
+        )
+        output = await self._shell_exec(device_id, script)
+        
+        props = {}
+        for line in output.splitlines():
+            key, sep, value = line.partition("=")
+            if sep and value:
+                props[key] = value
         return props
     
     async def shell_command(self, command: str, device_id: Optional[str] = None) -> str:
-        """Execute a shell command on the device"""
-        cmd_args = []
-        if device_id:
-            cmd_args.extend(["-s", device_id])
-        cmd_args.extend(["shell", command])
+        """Execute a shell command on the device
         
-        return await self._run_command(cmd_args)
+        The output includes the command's stderr, interleaved with stdout.
+        """
+        if "setprop" in command:
+            self._propcache.pop(device_id or "", None)
+        return await self._shell_exec(device_id, command)
+    
+    async def shell_commands(self, commands: List[str], device_id: Optional[str] = None
+                             ) -> List[Dict[str, Union[str, int]]]:
+        """Execute several shell commands on the device in one round-trip
+        
+        Commands run in order, each in its own `sh -c` like single commands,
+        so `exit`, `cd` or a syntax error only affect that command; each is
+        followed by an echo of a separator marker and its exit code, which
+        frames the combined output. A failing command does not stop the
+        batch. Returns one {"cmd", "stdout", "rc"} entry per command; if the
+        batch shell itself dies, the commands it never ran get rc -1.
+        """
+        if not commands:
+            return []
+        if any("setprop" in command for command in commands):
+            self._propcache.pop(device_id or "", None)
+        
+        if self.mock_mode:
+            return [
+                {"cmd": command,
+                 "stdout": await self._run_mock_command(self._args(device_id, "shell", command)),
+                 "rc": 0}
+                for command in commands
+            ]
+        
+        script = "".join(
+            f"sh -c {shlex.quote(command)} </dev/null\necho {_BATCH_SEP_MARKER}$?\n"
+            for command in commands
+        )
+        output, status = await self._shell_run(device_id, script.rstrip("\n"))
+        parts = _BATCH_SEP_RE.split(output)
+        
+        # parts alternates output and exit code: [out1, rc1, out2, rc2, ..., ""]
+        results = [
+            {"cmd": command, "stdout": stdout.strip(), "rc": int(rc)}
+            for command, stdout, rc in zip(commands, parts[0::2], parts[1::2])
+        ]
+        if len(results) < len(commands):
+            # A command killed the batch shell: it gets the trailing output
+            # and the shell's exit code, and the commands after it never ran
+            results.append({"cmd": commands[len(results)], "stdout": parts[-1].strip(), "rc": status})
+            results.extend({"cmd": command, "stdout": "", "rc": -1}
+                           for command in commands[len(results):])
+        
+        return results
     
     async def install_app(self, apk_path: str, device_id: Optional[str] = None) -> bool:
         """Install an APK file on the device"""
-        cmd_args = []
-        if device_id:
-            cmd_args.extend(["-s", device_id])
-        cmd_args.extend(["install", apk_path])
-        
         try:
-            await self._run_command(cmd_args)
+            await self._run_command(self._args(device_id, "install", apk_path))
             return True
         except ADBError:
             return False
     
     async def uninstall_app(self, package_name: str, device_id: Optional[str] = None) -> bool:
         """Uninstall an app by package name"""
-        cmd_args = []
-        if device_id:
-            cmd_args.extend(["-s", device_id])
-        cmd_args.extend(["uninstall", package_name])
-        
         try:
-            await self._run_command(cmd_args)
+            await self._run_command(self._args(device_id, "uninstall", package_name))
             return True
         except ADBError:
             return False
     
     async def push_file(self, local_path: str, remote_path: str, device_id: Optional[str] = None) -> bool:
-        """Push a file to the device"""
-        cmd_args = []
-        if device_id:
-            cmd_args.extend(["-s", device_id])
-        cmd_args.extend(["push", local_path, remote_path])
+        """Push a file to the device
+        
+        Regular files are sent over the adb server socket; directories, or a
+        server that is not running yet, go through the adb client. Local file
+        reads run in the default executor so they do not block the event loop.
+        """
+        if not self.mock_mode and os.path.isfile(local_path):
+            try:
+                async with self._subprocess_slot():
+                    await self._sync_push(local_path, remote_path, device_id)
+                return True
+            except OSError:
+                pass  # No server listening; the adb client below starts one
+            except (ADBError, asyncio.IncompleteReadError):
+                return False
         
         try:
-            await self._run_command(cmd_args)
+            await self._run_command(
+                self._args(device_id, "push", local_path, remote_path),
+                discard_stdout=True
+            )
             return True
         except ADBError:
             return False
     
     async def pull_file(self, remote_path: str, local_path: str, device_id: Optional[str] = None) -> bool:
-        """Pull a file from the device"""
-        cmd_args = []
-        if device_id:
-            cmd_args.extend(["-s", device_id])
-        cmd_args.extend(["pull", remote_path, local_path])
+        """Pull a file from the device
+        
+        Regular files are received over the adb server socket; directories, or
+        a server that is not running yet, go through the adb client. Local file
+        writes run in the default executor so they do not block the event loop.
+        """
+        if not self.mock_mode:
+            try:
+                async with self._subprocess_slot():
+                    if await self._sync_pull(remote_path, local_path, device_id):
+                        return True
+            except OSError:
+                pass  # No server listening; the adb client below starts one
+            except (ADBError, asyncio.IncompleteReadError):
+                return False
         
         try:
-            await self._run_command(cmd_args)
+            await self._run_command(
+                self._args(device_id, "pull", remote_path, local_path),
+                discard_stdout=True
+            )
             return True
         except ADBError:
             return False
+    
+    async def push_files(self, pairs: List[Tuple[str, str]],
+                         device_id: Optional[str] = None) -> List[bool]:
+        """Push several (local_path, remote_path) pairs to the device concurrently
+        
+        Transfers overlap up to the `max_concurrent_subprocs` limit. Returns
+        each transfer's success in input order.
+        """
+        return await asyncio.gather(
+            *[self.push_file(local, remote, device_id) for local, remote in pairs]
+        )
+    
+    async def pull_files(self, pairs: List[Tuple[str, str]],
+                         device_id: Optional[str] = None) -> List[bool]:
+        """Pull several (remote_path, local_path) pairs from the device concurrently
+        
+        Transfers overlap up to the `max_concurrent_subprocs` limit. Returns
+        each transfer's success in input order.
+        """
+        return await asyncio.gather(
+            *[self.pull_file(remote, local, device_id) for remote, local in pairs]
+        )
+    
+    async def get_logcat(self, device_id: Optional[str] = None,
+                         lines: Optional[int] = None) -> AsyncIterator[str]:
+        """Dump the device log, yielding text chunks as they are read
+        
+        If `lines` is given, only the most recent `lines` entries are dumped.
+        """
+        count = ("-t", str(lines)) if lines else ()
+        cmd_args = self._args(device_id, "logcat", "-d", *count)
+        
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        async for chunk in self._run_command_stream(cmd_args):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
 
     # TODO: Add more ADB operations
     # - start_app
     # - stop_app
-    # - get_logcat
     # - screenshot
 
 
@@ -234,6 +1083,8 @@ async def main():
             
     except ADBError as e:
         print(f"ADB Error: {e}")
+    finally:
+        await adb.aclose()
 
 
 if __name__ == "__main__":
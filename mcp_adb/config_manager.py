@@ -6,13 +6,33 @@ Handles loading and managing configuration settings from files and environment.
 
 import json
 import os
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Environment variables that override values from the config file
+_ENV_OVERRIDES = ('MCP_ADB_PATH', 'MCP_ADB_TIMEOUT', 'MCP_ADB_CONCURRENCY', 'MCP_ADB_LOG_LEVEL')
+
+# Sentinel for keys missing from the config
+_MISSING = object()
+
+# Number of parsed config files kept in ConfigManager's shared cache
+_CONFIG_CACHE_SIZE = 8
 
 
 class ConfigManager:
     """Configuration management for MCP ADB server"""
     
+    # Parsed configs shared by all instances, keyed by
+    # (path, mtime_ns, size, env overrides) so edits invalidate the entry
+    _config_cache: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+    
     def __init__(self, config_path: Optional[str] = None):
         if config_path:
             self.config_path = Path(config_path)
@@ -20,7 +40,21 @@ class ConfigManager:
             # Default to config directory relative to this file
             self.config_path = Path(__file__).parent / "config" / "default.json"
         
-        self._config = self._load_config()
+        self._set_config(self._load_config())
+    
+    def _set_config(self, config: Dict[str, Any]) -> None:
+        """Install a loaded config and snapshot the frequently read values"""
+        self._config = config
+        self._resolved: Dict[str, Any] = {}
+        
+        self._adb_path = self.get('adb.path', 'adb')
+        self._adb_timeout = self.get('adb.timeout', 30)
+        self._prop_cache_ttl = self.get('adb.prop_cache_ttl', 60)
+        self._max_concurrent_subprocs = self.get('adb.max_concurrent_subprocs', 8)
+        self._server_host = self.get('server.host', 'localhost')
+        self._server_port = self.get('server.port', 8765)
+        self._log_level = self.get('server.log_level', 'INFO')
+        self._enabled_tools = self.get('tools.enabled', [])
     
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from file"""
@@ -28,11 +62,30 @@ class ConfigManager:
             return self._get_default_config()
         
         try:
-            with open(self.config_path, 'r') as f:
-                config = json.load(f)
+            st = self.config_path.stat()
+            key = (
+                self.config_path,
+                st.st_mtime_ns,
+                st.st_size,
+                tuple(os.getenv(name) for name in _ENV_OVERRIDES)
+            )
+            cached = self._config_cache.get(key)
+            if cached is not None:
+                self._config_cache.move_to_end(key)
+                return cached
+            
+            if orjson is not None:
+                config = orjson.loads(self.config_path.read_bytes())
+            else:
+                with open(self.config_path, 'r') as f:
+                    config = json.load(f)
             
             # Override with environment variables
             config = self._apply_env_overrides(config)
+            
+            self._config_cache[key] = config
+            if len(self._config_cache) > _CONFIG_CACHE_SIZE:
+                self._config_cache.popitem(last=False)
             return config
             
         except Exception as e:
@@ -48,7 +101,9 @@ class ConfigManager:
             "adb": {
                 "path": "adb",
                 "timeout": 30,
-                "retry_attempts": 3
+                "retry_attempts": 3,
+                "prop_cache_ttl": 60,
+                "max_concurrent_subprocs": 8
             },
             "tools": {
                 "enabled": [
@@ -78,6 +133,14 @@ class ConfigManager:
             except ValueError:
                 pass
         
+        # Concurrency limit override
+        concurrency = os.getenv('MCP_ADB_CONCURRENCY')
+        if concurrency:
+            try:
+                config['adb']['max_concurrent_subprocs'] = int(concurrency)
+            except ValueError:
+                pass
+        
         # Log level override
         log_level = os.getenv('MCP_ADB_LOG_LEVEL')
         if log_level:
@@ -87,6 +150,13 @@ class ConfigManager:
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value using dot notation"""
+        value = self._resolved.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._resolved[key] = self._resolve(key)
+        return default if value is _MISSING else value
+    
+    def _resolve(self, key: str) -> Any:
+        """Walk the config for a dotted key, returning _MISSING if absent"""
         keys = key.split('.')
         value = self._config
         
@@ -94,30 +164,53 @@ class ConfigManager:
             if isinstance(value, dict) and k in value:
                 value = value[k]
             else:
-                return default
+                return _MISSING
         
         return value
     
     def reload(self) -> None:
-        """Reload configuration from file"""
-        self._config = self._load_config()
+        """Reload configuration from file
+        
+        The file is only re-parsed if its mtime or size has changed.
+        """
+        self._set_config(self._load_config())
     
     @property
     def adb_path(self) -> str:
         """Get ADB executable path"""
-        return self.get('adb.path', 'adb')
+        return self._adb_path
     
     @property
     def adb_timeout(self) -> int:
         """Get ADB command timeout"""
-        return self.get('adb.timeout', 30)
+        return self._adb_timeout
+    
+    @property
+    def prop_cache_ttl(self) -> float:
+        """Get how long device properties are cached, in seconds"""
+        return self._prop_cache_ttl
+    
+    @property
+    def max_concurrent_subprocs(self) -> int:
+        """Get the maximum number of adb processes run at once"""
+        return self._max_concurrent_subprocs
+    
+    @property
+    def server_host(self) -> str:
+        """Get the host the TCP transport listens on"""
+        return self._server_host
+    
+    @property
+    def server_port(self) -> int:
+        """Get the port the TCP transport listens on"""
+        return self._server_port
     
     @property
     def log_level(self) -> str:
         """Get logging level"""
-        return self.get('server.log_level', 'INFO')
+        return self._log_level
     
     @property
     def enabled_tools(self) -> list:
         """Get list of enabled tools"""
-        return self.get('tools.enabled', [])
\ No newline at end of file
+        return self._enabled_tools
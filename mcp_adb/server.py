@@ -5,25 +5,19 @@ This module implements the Model Context Protocol server that provides
 ADB (Android Debug Bridge) functionality to AI/LLM clients.
 """
 
+from __future__ import annotations
+
 import asyncio
-import json
 import logging
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence
+import socket
+from typing import Any, Dict, Optional
 
 try:
-    from mcp.server import Server
+    import anyio
+    from mcp.server import NotificationOptions, Server
     from mcp.server.models import InitializationOptions
     from mcp.server.stdio import stdio_server
-    from mcp.types import (
-        CallToolRequest,
-        CallToolResult,
-        ListToolsRequest,
-        Tool,
-        TextContent,
-        INVALID_PARAMS,
-        INTERNAL_ERROR
-    )
+    from mcp.types import JSONRPCMessage, TextContent, Tool
     MCP_AVAILABLE = True
 except ImportError:
     # Fallback for development without MCP installed
@@ -31,141 +25,96 @@ except ImportError:
     Server = object
     stdio_server = None
 
+try:
+    # Newer MCP versions exchange messages wrapped in SessionMessage
+    from mcp.shared.message import SessionMessage
+except ImportError:
+    SessionMessage = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
 from .adb_tools import ADBTools, ADBError
 from .config_manager import ConfigManager
+from .tools.adb_tools import ADB_TOOLS, validate
+
+
+log = logging.getLogger("mcp_adb.server")
+
+# Pending connections queued by the TCP listener
+TCP_BACKLOG = 2048
+
+# Longest JSON-RPC line accepted from a TCP client (asyncio defaults to 64 KiB)
+TCP_LINE_LIMIT = 16 << 20
+
+# Maximum number of characters of logcat output per TextContent page
+LOGCAT_PAGE_SIZE = 64 * 1024
+
+
+def _serialize(result: Dict[str, Any], pretty: bool = False) -> str:
+    """Serialize a tool result to JSON text
+    
+    orjson produces UTF-8 bytes in one C call; they are decoded only once, at
+    the TextContent boundary, since MCP text content must be a str.
+    """
+    if orjson is not None:
+        return orjson.dumps(result, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+    return json.dumps(result, indent=2 if pretty else None)
+
+
+# Compact responses of tools that only report success, serialized once
+_SUCCESS_TEXT = {flag: _serialize({"success": flag}) for flag in (True, False)}
 
 
 class MCPADBServer:
     """MCP Server for ADB operations"""
     
     def __init__(self, mock_mode: bool = False):
-        self.adb_tools = ADBTools(mock_mode=mock_mode)
-        self.logger = logging.getLogger(__name__)
+        self.config = ConfigManager()
+        self.adb_tools = ADBTools.get(
+            mock_mode=mock_mode,
+            prop_cache_ttl=self.config.prop_cache_ttl,
+            max_concurrent_subprocs=self.config.max_concurrent_subprocs,
+            command_timeout=self.config.adb_timeout
+        )
         self.server = None
         
         if MCP_AVAILABLE:
             self.server = Server("mcp-adb-try")
             self._register_handlers()
         else:
-            self.logger.warning("MCP library not available. Running in development mode.")
+            log.warning("MCP library not available. Running in development mode.")
     
     def _register_handlers(self) -> None:
         """Register MCP handlers"""
         if not self.server:
             return
             
+        # Tool definitions never change, so they are built once and shared;
+        # ADB_TOOLS is also what arguments are validated against
+        self._tools = [
+            Tool(name=d["name"], description=d["description"], inputSchema=d["input_schema"])
+            for d in (tool.as_dict() for tool in ADB_TOOLS)
+        ]
+
         @self.server.list_tools()
         async def handle_list_tools() -> list[Tool]:
             """List available ADB tools"""
-            return [
-                Tool(
-                    name="list_devices",
-                    description="List all connected Android devices",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
-                ),
-                Tool(
-                    name="get_device_info",
-                    description="Get detailed information about a specific device",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "device_id": {
-                                "type": "string",
-                                "description": "Device ID (optional, uses first available if not specified)"
-                            }
-                        },
-                        "required": []
-                    }
-                ),
-                Tool(
-                    name="shell_command",
-                    description="Execute a shell command on an Android device",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "command": {
-                                "type": "string", 
-                                "description": "Shell command to execute"
-                            },
-                            "device_id": {
-                                "type": "string",
-                                "description": "Device ID (optional)"
-                            }
-                        },
-                        "required": ["command"]
-                    }
-                ),
-                Tool(
-                    name="install_app",
-                    description="Install an APK file on an Android device",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "apk_path": {
-                                "type": "string",
-                                "description": "Path to the APK file"
-                            },
-                            "device_id": {
-                                "type": "string",
-                                "description": "Device ID (optional)"
-                            }
-                        },
-                        "required": ["apk_path"]
-                    }
-                ),
-                Tool(
-                    name="push_file",
-                    description="Push a file from local system to Android device",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "local_path": {
-                                "type": "string",
-                                "description": "Local file path"
-                            },
-                            "remote_path": {
-                                "type": "string", 
-                                "description": "Remote path on device"
-                            },
-                            "device_id": {
-                                "type": "string",
-                                "description": "Device ID (optional)"
-                            }
-                        },
-                        "required": ["local_path", "remote_path"]
-                    }
-                ),
-                Tool(
-                    name="pull_file",
-                    description="Pull a file from Android device to local system",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "remote_path": {
-                                "type": "string",
-                                "description": "Remote file path on device"
-                            },
-                            "local_path": {
-                                "type": "string",
-                                "description": "Local destination path"
-                            },
-                            "device_id": {
-                                "type": "string",
-                                "description": "Device ID (optional)"
-                            }
-                        },
-                        "required": ["remote_path", "local_path"]
-                    }
-                )
-            ]
+            return self._tools
 
         @self.server.call_tool()
         async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
             """Handle tool calls"""
+            arguments = arguments or {}
+            try:
+                validate(name, arguments)
+            except ValueError as e:
+                error_result = {"error": str(e), "type": "InvalidParams"}
+                return [TextContent(type="text", text=self._dumps(error_result))]
+            
             try:
                 if name == "list_devices":
                     devices = await self.adb_tools.list_devices()
@@ -176,7 +125,8 @@ class MCPADBServer:
                     
                 elif name == "get_device_info":
                     device_id = arguments.get("device_id")
-                    info = await self.adb_tools.get_device_info(device_id)
+                    refresh = arguments.get("refresh", False)
+                    info = await self.adb_tools.get_device_info(device_id, refresh)
                     result = {"device_info": info}
                     
                 elif name == "shell_command":
@@ -185,63 +135,211 @@ class MCPADBServer:
                     output = await self.adb_tools.shell_command(command, device_id)
                     result = {"output": output}
                     
+                elif name == "batch_shell":
+                    commands = arguments["commands"]
+                    device_id = arguments.get("device_id")
+                    results = await self.adb_tools.shell_commands(commands, device_id)
+                    result = {"results": results}
+                    
                 elif name == "install_app":
                     apk_path = arguments["apk_path"]
                     device_id = arguments.get("device_id")
                     success = await self.adb_tools.install_app(apk_path, device_id)
-                    result = {"success": success}
+                    return self._success_response(success)
+                    
+                elif name == "uninstall_app":
+                    package_name = arguments["package_name"]
+                    device_id = arguments.get("device_id")
+                    success = await self.adb_tools.uninstall_app(package_name, device_id)
+                    return self._success_response(success)
                     
                 elif name == "push_file":
                     local_path = arguments["local_path"]
                     remote_path = arguments["remote_path"]
                     device_id = arguments.get("device_id")
                     success = await self.adb_tools.push_file(local_path, remote_path, device_id)
-                    result = {"success": success}
+                    return self._success_response(success)
                     
                 elif name == "pull_file":
                     remote_path = arguments["remote_path"]
                     local_path = arguments["local_path"] 
                     device_id = arguments.get("device_id")
                     success = await self.adb_tools.pull_file(remote_path, local_path, device_id)
-                    result = {"success": success}
+                    return self._success_response(success)
+                    
+                elif name == "get_logcat":
+                    lines = arguments.get("lines")
+                    device_id = arguments.get("device_id")
+                    return await self._paginate_logcat(device_id, lines)
                     
                 else:
                     raise ValueError(f"Unknown tool: {name}")
                 
-                return [TextContent(type="text", text=json.dumps(result, indent=2))]
+                return [TextContent(type="text", text=self._dumps(result))]
                 
             except ADBError as e:
                 error_result = {"error": str(e), "type": "ADBError"}
-                return [TextContent(type="text", text=json.dumps(error_result, indent=2))]
+                return [TextContent(type="text", text=self._dumps(error_result))]
             except Exception as e:
-                self.logger.exception(f"Error handling tool call {name}")
+                log.exception("Error handling tool call %s", name)
                 error_result = {"error": str(e), "type": "UnknownError"}
-                return [TextContent(type="text", text=json.dumps(error_result, indent=2))]
+                return [TextContent(type="text", text=self._dumps(error_result))]
 
+    def _dumps(self, result: Dict[str, Any]) -> str:
+        """Serialize a tool result, pretty-printed only when debug logging"""
+        return _serialize(result, log.isEnabledFor(logging.DEBUG))
+    
+    def _success_response(self, success: bool) -> "list[TextContent]":
+        """Build the response of a tool that only reports success"""
+        if log.isEnabledFor(logging.DEBUG):
+            text = self._dumps({"success": success})
+        else:
+            text = _SUCCESS_TEXT[success]
+        return [TextContent(type="text", text=text)]
+    
+    async def _paginate_logcat(self, device_id: Optional[str],
+                               lines: Optional[int]) -> "list[TextContent]":
+        """Collect streamed logcat output into fixed-size TextContent pages"""
+        pages = []
+        buf = []
+        size = 0
+        
+        async for chunk in self.adb_tools.get_logcat(device_id, lines):
+            buf.append(chunk)
+            size += len(chunk)
+            while size >= LOGCAT_PAGE_SIZE:
+                text = "".join(buf)
+                pages.append(text[:LOGCAT_PAGE_SIZE])
+                rest = text[LOGCAT_PAGE_SIZE:]
+                buf = [rest]
+                size = len(rest)
+        
+        if size or not pages:
+            pages.append("".join(buf))
+        
+        return [
+            TextContent(
+                type="text",
+                text=self._dumps({"logcat": text, "page": i + 1, "pages": len(pages)})
+            )
+            for i, text in enumerate(pages)
+        ]
+    
     async def start_stdio(self) -> None:
         """Start the MCP server using stdio transport"""
         if not MCP_AVAILABLE:
-            self.logger.error("Cannot start server: MCP library not available")
+            log.error("Cannot start server: MCP library not available")
             return
             
         if not stdio_server:
-            self.logger.error("stdio_server not available")
+            log.error("stdio_server not available")
             return
             
-        self.logger.info("Starting MCP ADB server via stdio")
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream, 
-                write_stream, 
-                InitializationOptions(
-                    server_name="mcp-adb-try",
-                    server_version="0.1.0"
-                )
+        log.info("Starting MCP ADB server via stdio")
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(read_stream, write_stream, self._init_options())
+        finally:
+            await self.stop()
+    
+    def _init_options(self) -> InitializationOptions:
+        """Build the options the server reports to clients on initialization"""
+        return InitializationOptions(
+            server_name="mcp-adb-try",
+            server_version="0.1.0",
+            capabilities=self.server.get_capabilities(
+                notification_options=NotificationOptions(),
+                experimental_capabilities={}
+            )
+        )
+    
+    async def start_tcp(self) -> None:
+        """Start the MCP server on the configured TCP host and port
+        
+        Each connection carries newline-delimited JSON-RPC messages, as over
+        stdio. SO_REUSEPORT is set where supported, so several server
+        processes can bind the same port and let the kernel spread
+        connections between them.
+        """
+        if not MCP_AVAILABLE:
+            log.error("Cannot start server: MCP library not available")
+            return
+        
+        host, port = self.config.server_host, self.config.server_port
+        log.info("Starting MCP ADB server on %s:%s", host, port)
+        try:
+            listener = await asyncio.start_server(
+                self._handle_connection, host, port,
+                reuse_port=hasattr(socket, "SO_REUSEPORT"),
+                backlog=TCP_BACKLOG,
+                limit=TCP_LINE_LIMIT
             )
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            await self.stop()
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        """Run an MCP session over one TCP connection"""
+        # Responses are small frames; do not let Nagle's algorithm delay them
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        
+        incoming_send, incoming = anyio.create_memory_object_stream(0)
+        outgoing, outgoing_receive = anyio.create_memory_object_stream(0)
+        
+        async def read_messages() -> None:
+            # Errors are handled here: the task group would wrap them in an
+            # ExceptionGroup. Closing the incoming stream ends the session.
+            async with incoming_send:
+                try:
+                    async for line in reader:
+                        try:
+                            message = JSONRPCMessage.model_validate_json(line)
+                        except Exception as e:
+                            await incoming_send.send(e)
+                            continue
+                        if SessionMessage is not None:
+                            message = SessionMessage(message)
+                        await incoming_send.send(message)
+                except (ConnectionError, ValueError) as e:
+                    # ValueError: a line longer than TCP_LINE_LIMIT
+                    log.warning("Closing TCP connection: %s", e)
+        
+        async def write_messages() -> None:
+            async with outgoing_receive:
+                try:
+                    async for message in outgoing_receive:
+                        message = getattr(message, "message", message)
+                        data = message.model_dump_json(by_alias=True, exclude_none=True)
+                        writer.write(data.encode() + b"\n")
+                        await writer.drain()
+                except ConnectionError as e:
+                    log.debug("TCP client went away: %s", e)
+                    tg.cancel_scope.cancel()
+        
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(read_messages)
+                tg.start_soon(write_messages)
+                await self.server.run(incoming, outgoing, self._init_options())
+                tg.cancel_scope.cancel()
+        finally:
+            writer.close()
+    
+    async def stop(self) -> None:
+        """Release ADB resources held for this server
+        
+        Persistent shell sessions are terminated; the shared ADBTools instance
+        reopens them on demand if another server keeps using it.
+        """
+        await self.adb_tools.aclose()
     
     async def start_demo(self) -> None:
         """Start in demo mode for development/testing"""
-        self.logger.info("Starting MCP ADB server in demo mode")
+        log.info("Starting MCP ADB server in demo mode")
         
         # Demo implementation without actual MCP transport
         print("MCP ADB Server - Demo Mode")
@@ -249,16 +347,16 @@ class MCPADBServer:
         
         try:
             # Test ADB functionality
-            devices = await self.adb_tools.list_devices()
+            devices = await self.adb_tools.list_devices_with_info()
             print(f"Found {len(devices)} devices:")
             for device in devices:
-                print(f"  - {device}")
+                summary = {k: v for k, v in device.items() if k != "info"}
+                print(f"  - {summary}")
                 
-            if devices:
-                device_id = devices[0]['id']
-                info = await self.adb_tools.get_device_info(device_id)
-                print(f"\nDevice info sample (first 3 properties):")
-                for i, (key, value) in enumerate(info.items()):
+            device = next((d for d in devices if "info" in d), None)
+            if device:
+                print(f"\nDevice info sample for {device['id']} (first 3 properties):")
+                for i, (key, value) in enumerate(device["info"].items()):
                     if i >= 3:
                         break
                     print(f"  {key}: {value}")
@@ -267,6 +365,8 @@ class MCPADBServer:
             print(f"ADB Error: {e}")
         except Exception as e:
             print(f"Error: {e}")
+        finally:
+            await self.stop()
         
         print("\nDemo completed. In production, this would run as MCP server.")
 
@@ -283,10 +383,21 @@ def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
+    # uvloop speeds up the subprocess and socket I/O the server is built on
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     server = MCPADBServer(mock_mode=mock_mode)
     
     try:
-        if MCP_AVAILABLE:
+        if MCP_AVAILABLE and "--tcp" in sys.argv:
+            # Serve MCP clients over TCP on the configured host and port
+            asyncio.run(server.start_tcp())
+        elif MCP_AVAILABLE:
             # Run as actual MCP server
             asyncio.run(server.start_stdio())
         else:
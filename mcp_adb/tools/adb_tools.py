@@ -4,37 +4,85 @@ ADB Tools definitions for MCP
 Contains tool schemas and descriptions for various ADB operations.
 """
 
-from typing import Dict, Any, List
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+
+def _freeze(value: Any) -> Any:
+    """Make a JSON-like value read-only: dicts become mapping proxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Convert a value frozen by _freeze back into plain dicts and lists"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True)
+class Tool:
+    """Definition of an MCP tool; shared, so immutable throughout"""
+    __slots__ = ("name", "description", "input_schema")
+    
+    name: str
+    description: str
+    input_schema: Mapping[str, Any]
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the definition as plain JSON-serializable data"""
+        return {
+            "name": self.name,
+            "description": self.description,
+            "input_schema": _thaw(self.input_schema)
+        }
+
 
 # Tool definitions that would be used with MCP
-ADB_TOOLS = [
-    {
-        "name": "list_devices",
-        "description": "List all connected Android devices",
-        "input_schema": {
+ADB_TOOLS: List[Tool] = [
+    Tool(
+        name="list_devices",
+        description="List all connected Android devices",
+        input_schema=_freeze({
             "type": "object",
             "properties": {},
             "required": []
-        }
-    },
-    {
-        "name": "get_device_info", 
-        "description": "Get detailed information about a specific device",
-        "input_schema": {
+        })
+    ),
+    Tool(
+        name="get_device_info", 
+        description="Get detailed information about a specific device",
+        input_schema=_freeze({
             "type": "object",
             "properties": {
                 "device_id": {
                     "type": "string",
                     "description": "Device ID (optional, uses first available if not specified)"
+                },
+                "refresh": {
+                    "type": "boolean",
+                    "description": "Re-read properties from the device instead of using cached values (optional)"
                 }
             },
             "required": []
-        }
-    },
-    {
-        "name": "shell_command",
-        "description": "Execute a shell command on an Android device",
-        "input_schema": {
+        })
+    ),
+    Tool(
+        name="shell_command",
+        description="Execute a shell command on an Android device",
+        input_schema=_freeze({
             "type": "object", 
             "properties": {
                 "command": {
@@ -47,12 +95,31 @@ ADB_TOOLS = [
                 }
             },
             "required": ["command"]
-        }
-    },
-    {
-        "name": "install_app",
-        "description": "Install an APK file on an Android device",
-        "input_schema": {
+        })
+    ),
+    Tool(
+        name="batch_shell",
+        description="Execute several shell commands on an Android device in one call",
+        input_schema=_freeze({
+            "type": "object",
+            "properties": {
+                "commands": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Shell commands to execute, in order"
+                },
+                "device_id": {
+                    "type": "string",
+                    "description": "Device ID (optional)"
+                }
+            },
+            "required": ["commands"]
+        })
+    ),
+    Tool(
+        name="install_app",
+        description="Install an APK file on an Android device",
+        input_schema=_freeze({
             "type": "object",
             "properties": {
                 "apk_path": {
@@ -65,12 +132,12 @@ ADB_TOOLS = [
                 }
             },
             "required": ["apk_path"]
-        }
-    },
-    {
-        "name": "uninstall_app",
-        "description": "Uninstall an app by package name",
-        "input_schema": {
+        })
+    ),
+    Tool(
+        name="uninstall_app",
+        description="Uninstall an app by package name",
+        input_schema=_freeze({
             "type": "object",
             "properties": {
                 "package_name": {
@@ -83,12 +150,12 @@ ADB_TOOLS = [
                 }
             },
             "required": ["package_name"]
-        }
-    },
-    {
-        "name": "push_file",
-        "description": "Push a file from local system to Android device",
-        "input_schema": {
+        })
+    ),
+    Tool(
+        name="push_file",
+        description="Push a file from local system to Android device",
+        input_schema=_freeze({
             "type": "object",
             "properties": {
                 "local_path": {
@@ -105,12 +172,12 @@ ADB_TOOLS = [
                 }
             },
             "required": ["local_path", "remote_path"]
-        }
-    },
-    {
-        "name": "pull_file",
-        "description": "Pull a file from Android device to local system", 
-        "input_schema": {
+        })
+    ),
+    Tool(
+        name="pull_file",
+        description="Pull a file from Android device to local system", 
+        input_schema=_freeze({
             "type": "object",
             "properties": {
                 "remote_path": {
@@ -127,19 +194,95 @@ ADB_TOOLS = [
                 }
             },
             "required": ["remote_path", "local_path"]
-        }
-    }
+        })
+    ),
+    Tool(
+        name="get_logcat",
+        description="Dump the log buffer of an Android device",
+        input_schema=_freeze({
+            "type": "object",
+            "properties": {
+                "lines": {
+                    "type": "integer",
+                    "description": "Only return the most recent N lines (optional)"
+                },
+                "device_id": {
+                    "type": "string",
+                    "description": "Device ID (optional)"
+                }
+            },
+            "required": []
+        })
+    )
 ]
 
 
-def get_tool_by_name(name: str) -> Dict[str, Any]:
+_TOOLS_BY_NAME: Dict[str, Tool] = {tool.name: tool for tool in ADB_TOOLS}
+_ALL_TOOL_NAMES: Tuple[str, ...] = tuple(_TOOLS_BY_NAME)
+
+
+def get_tool_by_name(name: str) -> Tool:
     """Get tool definition by name"""
-    for tool in ADB_TOOLS:
-        if tool["name"] == name:
-            return tool
-    raise ValueError(f"Tool not found: {name}")
+    try:
+        return _TOOLS_BY_NAME[name]
+    except KeyError:
+        raise ValueError(f"Tool not found: {name}") from None
+
+
+def get_all_tool_names() -> Tuple[str, ...]:
+    """Get all available tool names"""
+    return _ALL_TOOL_NAMES
+
+
+# Python types for the JSON Schema types used by ADB_TOOLS
+_JSON_TYPES = {"string": str, "integer": int, "boolean": bool, "array": list, "object": dict}
+
+
+def _compile_basic(schema: Mapping[str, Any]) -> Callable[[Any], Any]:
+    """Build a validator checking required properties and their top-level types
+    
+    Used when fastjsonschema is not installed; covers what ADB_TOOLS schemas
+    express apart from array item types.
+    """
+    required = schema.get("required", ())
+    types = {key: _JSON_TYPES[prop["type"]] for key, prop in schema["properties"].items()}
+    
+    def validate_basic(args: Any) -> Any:
+        if not isinstance(args, dict):
+            raise ValueError("Tool arguments must be an object")
+        for key in required:
+            if key not in args:
+                raise ValueError(f"Missing required argument: {key}")
+        for key, value in args.items():
+            expected = types.get(key)
+            if expected is not None and (
+                    not isinstance(value, expected)
+                    or (expected is int and isinstance(value, bool))):
+                raise ValueError(f"Argument {key} must be of type {expected.__name__}")
+        return args
+    
+    return validate_basic
+
+
+# Argument validators, compiled once since schemas never change at runtime
+if fastjsonschema is not None:
+    _VALIDATORS = {
+        name: fastjsonschema.compile(_thaw(tool.input_schema))
+        for name, tool in _TOOLS_BY_NAME.items()
+    }
+else:
+    _VALIDATORS = {
+        name: _compile_basic(tool.input_schema) for name, tool in _TOOLS_BY_NAME.items()
+    }
 
 
-def get_all_tool_names() -> List[str]:
-    """Get list of all available tool names"""
-    return [tool["name"] for tool in ADB_TOOLS]
\ No newline at end of file
+def validate(name: str, args: Any) -> None:
+    """Validate tool call arguments against the tool's input schema
+    
+    Raises ValueError for unknown tools and invalid arguments.
+    """
+    try:
+        validator = _VALIDATORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown tool: {name}") from None
+    validator(args)
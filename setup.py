@@ -0,0 +1,23 @@
+"""
+Build script for optional compiled extensions
+
+Project metadata lives in pyproject.toml. This only adds the Cython
+getprop parser; when Cython is unavailable (it is not a build requirement,
+so install it and build with --no-build-isolation to get the extension) or
+the extension fails to compile, the package installs as pure Python and
+falls back to the parsers in adb_tools.
+"""
+
+from setuptools import Extension, setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    ext_modules = []
+else:
+    ext_modules = cythonize(
+        [Extension("mcp_adb._parsers", ["mcp_adb/_parsers.pyx"], optional=True)],
+        language_level=3
+    )
+
+setup(ext_modules=ext_modules)
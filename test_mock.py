@@ -39,12 +39,18 @@ async def test_mock_mode():
         
         # Test file operations
         print(f"\n4. Testing file operations...")
+        # The pull reads back the pushed file, so it must wait for the push
         push_result = await adb.push_file("/tmp/test.txt", "/data/test.txt")
         print(f"   Push file result: {push_result}")
         
         pull_result = await adb.pull_file("/data/test.txt", "/tmp/pulled.txt")
         print(f"   Pull file result: {pull_result}")
         
+        # Independent transfers can overlap
+        batch_results = await adb.push_files([("/tmp/a.txt", "/data/a.txt"),
+                                              ("/tmp/b.txt", "/data/b.txt")])
+        print(f"   Batch push results: {batch_results}")
+        
         print(f"\n✅ All tests completed successfully!")
         
     except ADBError as e:
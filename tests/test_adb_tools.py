@@ -2,47 +2,531 @@
 Basic tests for ADB Tools
 """
 
+import asyncio
+import stat
+import struct
+
 import pytest
+import pytest_asyncio
 from unittest.mock import AsyncMock, patch
-from mcp_adb.adb_tools import ADBTools, ADBError
+from mcp_adb.adb_tools import ADBTools, ADBError, _BATCH_SEP_MARKER, _py_parse_getprop
+
+# Value in a fake server's `files` marking a symlink to a directory
+DIR_LINK = object()
+
+GETPROP_EDGE_CASES = [
+    ("[a]: [b]]", {"a": "b"}),
+    ("[a]: [b]\r\n[c]: [d]\r\n", {"a": "b]\r", "c": "d]\r"}),
+    ("[a]: [first\nsecond]\n[c]: [d]", {"a": "first", "c": "d"}),
+    ("[a]: []\nnoise\n\n[x]: [y: [z]]", {"a": "", "x": "y: [z"}),
+]
+
+
+async def fake_adb_server(files, transports=None, truncate=False):
+    """Start a minimal adb server serving `host:devices-l` and SYNC requests
+    
+    `files` maps remote paths to their contents (or DIR_LINK); pushed files
+    are stored in it.
+    Transport requests are appended to `transports` if given. With `truncate`,
+    host replies are cut off mid-payload and the connection is closed.
+    """
+    async def read_request(reader):
+        length = int(await reader.readexactly(4), 16)
+        return (await reader.readexactly(length)).decode()
+    
+    async def handle(reader, writer):
+        request = await read_request(reader)
+        if truncate and request.startswith("host:") and "transport" not in request:
+            writer.write(b"OKAY" + (b"0000" if request == "host:track-devices" else b""))
+            writer.write(b"0040" + b"1234567890abcdef\tdev")
+        elif request == "host:devices-l":
+            payload = b"1234567890abcdef\tdevice usb:1-1 model:Test_Model\n"
+            writer.write(b"OKAY%04x%s" % (len(payload), payload))
+        elif request == "host:track-devices":
+            writer.write(b"OKAY")
+            for payload in (b"", b"1234567890abcdef\toffline\n", b"1234567890abcdef\tdevice\n"):
+                writer.write(b"%04x%s" % (len(payload), payload))
+        elif request.startswith("host:transport"):
+            if transports is not None:
+                transports.append(request)
+            writer.write(b"OKAY")
+            assert await read_request(reader) == "sync:"
+            writer.write(b"OKAY")
+            while True:
+                try:
+                    header = await reader.readexactly(8)
+                except asyncio.IncompleteReadError:
+                    break
+                path = (await reader.readexactly(struct.unpack("<I", header[4:])[0])).decode()
+                if header[:4] == b"STAT":
+                    # Like adbd, lstat() unless a trailing slash forces resolution
+                    if files.get(path.rstrip("/")) is DIR_LINK:
+                        mode = stat.S_IFDIR | 0o771 if path.endswith("/") else stat.S_IFLNK | 0o777
+                    else:
+                        mode = stat.S_IFREG | 0o644 if path in files else 0
+                    writer.write(b"STAT" + struct.pack("<III", mode, 0, 0))
+                elif header[:4] == b"SEND":
+                    path, data = path.rsplit(",", 1)[0], b""
+                    while (header := await reader.readexactly(8))[:4] == b"DATA":
+                        data += await reader.readexactly(struct.unpack("<I", header[4:])[0])
+                    if files.get(path) is DIR_LINK:
+                        message = b"couldn't create file: Is a directory"
+                        writer.write(b"FAIL" + struct.pack("<I", len(message)) + message)
+                        continue
+                    files[path] = data
+                    writer.write(b"OKAY\0\0\0\0")
+                elif header[:4] == b"RECV":
+                    data = files[path]
+                    writer.write(b"DATA" + struct.pack("<I", len(data)) + data)
+                    writer.write(b"DONE\0\0\0\0")
+        await writer.drain()
+        writer.close()
+    
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+@pytest.fixture(scope="module")
+def single_device_output():
+    """`adb devices -l` output for one connected device"""
+    return """List of devices attached
+1234567890abcdef	device usb:1-1 product:test_product model:Test_Model device:test_device"""
+
+
+@pytest.fixture(scope="module")
+def getprop_output():
+    """`getprop` output for a device"""
+    return """[ro.build.version.release]: [14]
+[ro.product.model]: [Pixel 7]"""
+
+
+@pytest.fixture
+def adb():
+    """ADBTools exercising the real parsers, with no adb server reachable
+    
+    Commands are patched in each test.
+    """
+    adb = ADBTools()
+    adb.mock_mode = False
+    adb._open_adb_socket = AsyncMock(side_effect=ConnectionRefusedError())
+    return adb
+
+
+@pytest_asyncio.fixture
+async def sh_adb(tmp_path):
+    """ADBTools whose `adb shell` is a local sh, for exercising session framing"""
+    script = tmp_path / "adb"
+    script.write_text('#!/bin/sh\n[ "$1" = version ] && exit 0\nexec sh\n')
+    script.chmod(0o755)
+    adb = ADBTools(adb_path=str(script), command_timeout=2.0)
+    yield adb
+    await adb.aclose()
+
+
+@pytest_asyncio.fixture
+async def server_adb(request):
+    """ADBTools talking to a fake adb server, as (adb, files, transports)
+    
+    Parametrize indirectly with fake_adb_server options, e.g. {"truncate": True}.
+    """
+    files, transports = {}, []
+    server = await fake_adb_server(files, transports, **getattr(request, "param", {}))
+    adb = ADBTools()
+    adb.mock_mode = False
+    adb.adb_server = server.sockets[0].getsockname()
+    try:
+        yield adb, files, transports
+    finally:
+        await adb.aclose()
+        server.close()
+        await server.wait_closed()
 
 
 class TestADBTools:
     """Test cases for ADB Tools"""
     
-    def setup_method(self):
-        """Setup test fixtures"""
-        self.adb = ADBTools()
-    
     @pytest.mark.asyncio
-    async def test_list_devices_success(self):
+    async def test_list_devices_success(self, adb, single_device_output):
         """Test successful device listing"""
-        mock_output = """List of devices attached
-1234567890abcdef	device usb:1-1 product:test_product model:Test_Model device:test_device"""
-        
-        with patch.object(self.adb, '_run_command', return_value=mock_output) as mock_cmd:
-            devices = await self.adb.list_devices()
+        with patch.object(adb, '_run_command', return_value=single_device_output) as mock_cmd:
+            devices = await adb.list_devices()
             
             mock_cmd.assert_called_once_with(["devices", "-l"])
             assert len(devices) == 1
             assert devices[0]["id"] == "1234567890abcdef"
             assert devices[0]["status"] == "device"
+            assert devices[0]["model"] == "Test_Model"
+            assert devices[0]["usb"] == "1-1"
+    
+    @pytest.mark.asyncio
+    async def test_list_devices_via_adb_server(self, server_adb):
+        """Test devices are listed over the adb server socket when it is running"""
+        adb, _, _ = server_adb
+        
+        with patch.object(adb, '_run_command') as mock_cmd:
+            devices = await adb.list_devices()
+        
+        mock_cmd.assert_not_called()
+        assert devices == [{"id": "1234567890abcdef", "status": "device",
+                            "usb": "1-1", "model": "Test_Model"}]
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("server_adb", [{"truncate": True}], indirect=True)
+    async def test_list_devices_truncated_reply(self, server_adb):
+        """Test a reply cut short by the adb server raises ADBError"""
+        adb, _, _ = server_adb
+        
+        with pytest.raises(ADBError):
+            await adb.list_devices()
+    
+    @pytest.mark.asyncio
+    async def test_transport_uses_android_serial(self, server_adb, tmp_path, monkeypatch):
+        """Test the default device is taken from $ANDROID_SERIAL when set"""
+        monkeypatch.setenv("ANDROID_SERIAL", "1234567890abcdef")
+        adb, files, transports = server_adb
+        files["/sdcard/a.txt"] = b"hello"
+        
+        assert await adb.pull_file("/sdcard/a.txt", str(tmp_path / "a.txt"))
+        
+        assert transports == ["host:transport:1234567890abcdef"]
     
     @pytest.mark.asyncio
-    async def test_list_devices_empty(self):
+    async def test_watch_devices_yields_updates(self, server_adb):
+        """Test device list changes are pushed over one track-devices connection"""
+        adb, _, _ = server_adb
+        
+        updates = []
+        async for devices in adb.watch_devices():
+            updates.append(devices)
+            if len(updates) == 3:
+                break
+        
+        assert updates == [
+            [],
+            [{"id": "1234567890abcdef", "status": "offline"}],
+            [{"id": "1234567890abcdef", "status": "device"}]
+        ]
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("server_adb", [{"truncate": True}], indirect=True)
+    async def test_watch_devices_server_gone(self, server_adb):
+        """Test the adb server closing mid-stream raises ADBError to subscribers"""
+        adb, _, _ = server_adb
+        
+        updates = []
+        with pytest.raises(ADBError):
+            async for devices in adb.watch_devices():
+                updates.append(devices)
+        assert updates == [[]]
+    
+    @pytest.mark.asyncio
+    async def test_push_pull_via_sync_protocol(self, server_adb, tmp_path):
+        """Test files round-trip through the adb server SYNC protocol"""
+        adb, files, transports = server_adb
+        
+        local = tmp_path / "local.bin"
+        local.write_bytes(bytes(range(256)) * 6000)
+        
+        with patch.object(adb, '_run_command') as mock_cmd:
+            assert await adb.push_file(str(local), "/sdcard/remote.bin", "1234567890abcdef")
+            assert await adb.pull_file("/sdcard/remote.bin", str(tmp_path / "pulled.bin"),
+                                       "1234567890abcdef")
+        
+        mock_cmd.assert_not_called()
+        # The pull reuses the pooled SYNC connection opened by the push
+        assert transports == ["host:transport:1234567890abcdef"]
+        assert files["/sdcard/remote.bin"] == local.read_bytes()
+        assert (tmp_path / "pulled.bin").read_bytes() == local.read_bytes()
+    
+    @pytest.mark.asyncio
+    async def test_push_into_symlinked_directory(self, server_adb, tmp_path):
+        """Test pushing to a symlink to a directory (e.g. /sdcard) copies into it"""
+        adb, files, _ = server_adb
+        files["/sdcard"] = DIR_LINK
+        local = tmp_path / "x.txt"
+        local.write_bytes(b"hello")
+        
+        with patch.object(adb, '_run_command') as mock_cmd:
+            assert await adb.push_file(str(local), "/sdcard", "1234567890abcdef")
+        
+        mock_cmd.assert_not_called()
+        assert files["/sdcard/x.txt"] == b"hello"
+    
+    @pytest.mark.asyncio
+    async def test_push_pull_files_order_and_failures(self, adb, tmp_path):
+        """Test batched transfers report each pair's result in input order"""
+        async def run_command(args, **kwargs):
+            # Later pairs finish first; paths containing "bad" fail
+            await asyncio.sleep(0.01 * (3 - int(args[-1][-1])))
+            if any("bad" in arg for arg in args):
+                raise ADBError("remote object does not exist")
+            return ""
+        
+        with patch.object(adb, '_run_command', side_effect=run_command) as mock_cmd:
+            pushed = await adb.push_files([(str(tmp_path / "d0"), "/sdcard/f0"),
+                                           (str(tmp_path / "bad"), "/sdcard/f1"),
+                                           (str(tmp_path / "d2"), "/sdcard/f2")])
+            pulled = await adb.pull_files([("/sdcard/bad", str(tmp_path / "l0")),
+                                           ("/sdcard/f1", str(tmp_path / "l1")),
+                                           ("/sdcard/bad", str(tmp_path / "l2"))])
+        
+        assert pushed == [True, False, True]
+        assert pulled == [False, True, False]
+        assert mock_cmd.call_count == 6
+    
+    @pytest.mark.asyncio
+    async def test_list_devices_empty(self, adb):
         """Test device listing when no devices connected"""
         mock_output = "List of devices attached"
         
-        with patch.object(self.adb, '_run_command', return_value=mock_output):
-            devices = await self.adb.list_devices()
+        with patch.object(adb, '_run_command', return_value=mock_output):
+            devices = await adb.list_devices()
             assert len(devices) == 0
     
     @pytest.mark.asyncio
-    async def test_adb_command_failure(self):
+    async def test_get_device_info_uses_shell_session(self, adb, getprop_output):
+        """Test getprop output is fetched via the persistent shell session"""
+        with patch.object(adb, '_shell_exec', return_value=getprop_output) as mock_exec:
+            info = await adb.get_device_info("1234567890abcdef")
+            
+            mock_exec.assert_called_once_with("1234567890abcdef", "getprop")
+            assert info == {
+                "ro.build.version.release": "14",
+                "ro.product.model": "Pixel 7"
+            }
+    
+    @pytest.mark.parametrize("output,expected", GETPROP_EDGE_CASES)
+    def test_parse_getprop_edge_cases(self, output, expected):
+        """Test the pure-Python getprop parser keeps the line-splitting semantics"""
+        assert _py_parse_getprop(output) == expected
+    
+    @pytest.mark.parametrize("output,expected", GETPROP_EDGE_CASES)
+    def test_parse_getprop_cython_parity(self, getprop_output, output, expected):
+        """Test the Cython getprop parser returns what the pure-Python one does"""
+        parsers = pytest.importorskip("mcp_adb._parsers")
+        for text in (output, getprop_output):
+            assert parsers.parse_getprop(text) == _py_parse_getprop(text)
+    
+    @pytest.mark.asyncio
+    async def test_get_device_info_cached(self, adb):
+        """Test repeated device info lookups reuse cached properties"""
+        mock_output = "[ro.product.model]: [Pixel 7]"
+        
+        with patch.object(adb, '_shell_exec', return_value=mock_output) as mock_exec:
+            first = await adb.get_device_info("1234567890abcdef")
+            second = await adb.get_device_info("1234567890abcdef")
+            
+            mock_exec.assert_called_once()
+            assert first == second == {"ro.product.model": "Pixel 7"}
+    
+    @pytest.mark.asyncio
+    async def test_list_devices_prunes_disconnected_props(self, adb):
+        """Test cached properties are dropped once a device disappears"""
+        with patch.object(adb, '_shell_exec', return_value="[ro.product.model]: [Pixel 7]"):
+            await adb.get_device_info("1234567890abcdef")
+        
+        with patch.object(adb, '_run_command', return_value="List of devices attached"):
+            await adb.list_devices()
+        
+        assert "1234567890abcdef" not in adb._propcache
+    
+    @pytest.mark.asyncio
+    async def test_list_devices_with_info(self, adb):
+        """Test per-device info, errors and offline devices keep the listing order"""
+        listing = "List of devices attached\nslow\tdevice\nbroken\tdevice\ngone\toffline\nfast\tdevice"
+        
+        async def get_device_info(device_id):
+            # Earlier devices answer last
+            await asyncio.sleep({"slow": 0.02, "broken": 0.01}.get(device_id, 0))
+            if device_id == "broken":
+                raise ADBError("device unauthorized")
+            return {"model": device_id.upper()}
+        
+        with patch.object(adb, '_run_command', return_value=listing), \
+                patch.object(adb, 'get_device_info', side_effect=get_device_info) as mock_info:
+            devices = await adb.list_devices_with_info()
+        
+        assert devices == [
+            {"id": "slow", "status": "device", "info": {"model": "SLOW"}},
+            {"id": "broken", "status": "device", "error": "device unauthorized"},
+            {"id": "gone", "status": "offline"},
+            {"id": "fast", "status": "device", "info": {"model": "FAST"}}
+        ]
+        assert mock_info.call_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_list_devices_drops_default_props_on_swap(self, adb):
+        """Test default-device properties are dropped when the device is swapped"""
+        listing = "List of devices attached\n{}\tdevice"
+        
+        with patch.object(adb, '_run_command', return_value=listing.format("aaaa")):
+            await adb.list_devices()
+        with patch.object(adb, '_shell_exec', return_value="[ro.product.model]: [Pixel 7]"):
+            await adb.get_device_info()
+        
+        with patch.object(adb, '_run_command', return_value=listing.format("aaaa")):
+            await adb.list_devices()
+        assert "" in adb._propcache
+        
+        with patch.object(adb, '_run_command', return_value=listing.format("bbbb")):
+            await adb.list_devices()
+        assert "" not in adb._propcache
+    
+    @pytest.mark.asyncio
+    async def test_get_device_props_single_round_trip(self, adb):
+        """Test selected properties are fetched with one shell command"""
+        mock_output = """ro.build.version.release=14
+ro.product.model=Pixel 7
+ro.missing="""
+        
+        with patch.object(adb, '_shell_exec', return_value=mock_output) as mock_exec:
+            props = await adb.get_device_props(
+                ["ro.build.version.release", "ro.product.model", "ro.missing"],
+                "1234567890abcdef"
+            )
+            
+            mock_exec.assert_called_once()
+            assert "getprop ro.product.model" in mock_exec.call_args.args[1]
+            assert props == {
+                "ro.build.version.release": "14",
+                "ro.product.model": "Pixel 7"
+            }
+    
+    @pytest.mark.asyncio
+    async def test_shell_commands_single_round_trip(self, adb):
+        """Test batched commands share one shell call and keep their exit codes"""
+        sep = _BATCH_SEP_MARKER
+        mock_output = f"a.txt\n{sep}0\n{sep}1\nhello\n{sep}0"
+        
+        with patch.object(adb, '_shell_run', return_value=(mock_output, 0)) as mock_exec:
+            results = await adb.shell_commands(["ls", "false", "echo hello"])
+            
+            mock_exec.assert_called_once()
+            assert results == [
+                {"cmd": "ls", "stdout": "a.txt", "rc": 0},
+                {"cmd": "false", "stdout": "", "rc": 1},
+                {"cmd": "echo hello", "stdout": "hello", "rc": 0}
+            ]
+    
+    @pytest.mark.asyncio
+    async def test_shell_commands_isolated(self, sh_adb):
+        """Test each batched command runs on its own and cannot disturb the framing"""
+        results = await sh_adb.shell_commands(
+            ["echo a \\", "echo b; exit 3", "echo 'oops", "cd / && pwd", "pwd", "echo c"]
+        )
+        
+        assert [result["rc"] for result in results] == [0, 3, 2, 0, 0, 0]
+        # The trailing backslash no longer swallows the separator echo
+        assert results[0]["stdout"] == "a \\"
+        assert results[1]["stdout"] == "b"
+        assert results[3]["stdout"] == "/"
+        assert results[4]["stdout"] != "/"
+        assert results[5] == {"cmd": "echo c", "stdout": "c", "rc": 0}
+        assert await sh_adb.shell_commands(["echo __MCP_SEP__0"]) == [
+            {"cmd": "echo __MCP_SEP__0", "stdout": "__MCP_SEP__0", "rc": 0}
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_shell_commands_reports_unrun_commands(self, sh_adb):
+        """Test commands left unrun when the batch shell dies are reported as failures"""
+        results = await sh_adb.shell_commands(["echo a", "kill -9 $PPID", "echo c"])
+        
+        assert results[0] == {"cmd": "echo a", "stdout": "a", "rc": 0}
+        assert results[1]["rc"] == 137
+        assert results[2] == {"cmd": "echo c", "stdout": "", "rc": -1}
+    
+    @pytest.mark.asyncio
+    async def test_shell_session_framing(self, sh_adb):
+        """Test each command is isolated and a cancelled call cannot desync replies"""
+        assert await sh_adb._shell_exec(None, "echo one") == "one"
+        
+        # `cd` and variables do not carry over; stdin reads see EOF
+        assert await sh_adb._shell_exec(None, "cd / && export FOO=bar") == ""
+        assert await sh_adb._shell_exec(None, 'echo "$PWD:$FOO"') != "/:bar"
+        assert await sh_adb._shell_exec(None, "cat; echo done") == "done"
+        
+        # An unterminated quote fails on its own instead of swallowing the marker
+        with pytest.raises(ADBError):
+            await sh_adb._shell_exec(None, "echo 'oops")
+        assert await sh_adb._shell_exec(None, "echo two") == "two"
+        
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(sh_adb._shell_exec(None, "sleep 1; echo late"), 0.1)
+        assert await sh_adb._shell_exec(None, "echo three") == "three"
+        
+        with pytest.raises(ADBError, match="timed out"):
+            await sh_adb._shell_exec(None, "sleep 5")
+        assert await sh_adb._shell_exec(None, "printf '\\377'") == "\ufffd"
+    
+    @pytest.mark.asyncio
+    async def test_shell_session_keeps_adb_error(self, tmp_path):
+        """Test the adb client's message is reported when the session exits at once"""
+        script = tmp_path / "adb"
+        script.write_text("#!/bin/sh\necho \"adb: device 'nosuch' not found\" >&2\nexit 1\n")
+        script.chmod(0o755)
+        adb = ADBTools(adb_path=str(script))
+        adb.mock_mode = False
+        
+        with pytest.raises(ADBError, match="ADB command failed: adb: device 'nosuch' not found"):
+            await adb.shell_command("echo hi", "nosuch")
+        await adb.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_shell_session_large_output(self, sh_adb):
+        """Test replies larger than the stream buffer limit are framed intact"""
+        size = (8 << 20) + 12345
+        output = await sh_adb._shell_exec(None, f"head -c {size} /dev/zero | tr '\\0' a")
+        assert output == "a" * size
+        assert await sh_adb._shell_exec(None, "echo next") == "next"
+    
+    @pytest.mark.asyncio
+    async def test_get_logcat_streams_chunks(self, adb):
+        """Test logcat chunks are decoded even when split mid-character"""
+        encoded = "I/Test: こんにちは\n".encode()
+        
+        async def fake_stream(args):
+            yield encoded[:10]
+            yield encoded[10:]
+        
+        with patch.object(adb, '_run_command_stream', side_effect=fake_stream) as mock_stream:
+            chunks = [chunk async for chunk in adb.get_logcat("1234567890abcdef", lines=100)]
+            
+            mock_stream.assert_called_once_with(
+                ("-s", "1234567890abcdef", "logcat", "-d", "-t", "100")
+            )
+            assert "".join(chunks) == "I/Test: こんにちは\n"
+    
+    @pytest.mark.asyncio
+    async def test_spawn_allows_posix_spawn(self, adb):
+        """Test adb is launched with the arguments posix_spawn requires"""
+        adb._adb_executable = "/usr/bin/adb"
+        
+        with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_exec:
+            await adb._spawn(["devices", "-l"])
+            
+            mock_exec.assert_called_once_with(
+                "/usr/bin/adb", "devices", "-l", close_fds=False, limit=8 << 20
+            )
+    
+    @pytest.mark.asyncio
+    async def test_mock_structured_matches_parsed_mock_output(self, adb):
+        """Test mock fast path returns what parsing the mock output would"""
+        mock_adb = ADBTools(mock_mode=True)
+        
+        devices = await mock_adb.list_devices()
+        info = await mock_adb.get_device_info("mock_device_001")
+        
+        with patch.object(adb, '_run_command', side_effect=mock_adb._run_mock_command):
+            assert devices == await adb.list_devices()
+        with patch.object(adb, '_shell_exec',
+                          return_value=await mock_adb._run_mock_command(["shell", "getprop"])):
+            assert info == await adb.get_device_info("mock_device_001")
+    
+    @pytest.mark.asyncio
+    async def test_adb_command_failure(self, adb):
         """Test ADB command failure handling"""
-        with patch.object(self.adb, '_run_command', side_effect=ADBError("Command failed")):
+        with patch.object(adb, '_run_command', side_effect=ADBError("Command failed")):
             with pytest.raises(ADBError):
-                await self.adb.list_devices()
+                await adb.list_devices()
 
 
 if __name__ == "__main__":
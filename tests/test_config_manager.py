@@ -0,0 +1,66 @@
+"""
+Tests for the configuration manager
+"""
+
+import json
+import os
+from collections import OrderedDict
+
+import pytest
+from mcp_adb.config_manager import ConfigManager, _ENV_OVERRIDES
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    """A config file on disk, with an empty parse cache and no env overrides"""
+    monkeypatch.setattr(ConfigManager, "_config_cache", OrderedDict())
+    for name in _ENV_OVERRIDES:
+        monkeypatch.delenv(name, raising=False)
+
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"server": {}, "adb": {"timeout": 30}}))
+    return path
+
+
+class TestConfigCache:
+    """Test cases for the shared parsed-config cache"""
+    
+    def test_unchanged_reload_is_cache_hit(self, config_file):
+        """Test reloading an unchanged file reuses the parsed config"""
+        config = ConfigManager(str(config_file))
+        parsed = config._config
+        
+        config.reload()
+        
+        assert config._config is parsed
+        assert ConfigManager(str(config_file))._config is parsed
+        assert len(ConfigManager._config_cache) == 1
+    
+    def test_edited_file_invalidates(self, config_file):
+        """Test editing the file is picked up on reload"""
+        config = ConfigManager(str(config_file))
+        assert config.adb_timeout == 30
+        
+        st = config_file.stat()
+        config_file.write_text(json.dumps({"server": {}, "adb": {"timeout": 45}}))
+        # Same size, so only the mtime tells the versions apart
+        os.utime(config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+        config.reload()
+        
+        assert config.adb_timeout == 45
+    
+    def test_env_override_change_invalidates(self, config_file, monkeypatch):
+        """Test changing an MCP_ADB_* variable is picked up on reload"""
+        config = ConfigManager(str(config_file))
+        
+        monkeypatch.setenv("MCP_ADB_TIMEOUT", "90")
+        config.reload()
+        assert config.adb_timeout == 90
+        
+        monkeypatch.setenv("MCP_ADB_TIMEOUT", "120")
+        config.reload()
+        assert config.adb_timeout == 120
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
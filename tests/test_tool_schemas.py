@@ -0,0 +1,37 @@
+"""
+Tests for MCP tool definitions
+"""
+
+import pytest
+from mcp_adb.tools.adb_tools import _compile_basic, get_tool_by_name, validate
+
+
+class TestToolSchemas:
+    """Test cases for tool argument validation"""
+    
+    def test_validate_accepts_valid_arguments(self):
+        """Test arguments matching the schema pass validation"""
+        validate("shell_command", {"command": "ls", "device_id": "1234567890abcdef"})
+        validate("batch_shell", {"commands": ["ls", "pwd"]})
+        validate("list_devices", {})
+    
+    @pytest.mark.parametrize("name, args", [
+        ("shell_command", {}),
+        ("shell_command", {"command": 1}),
+        ("get_logcat", {"lines": "100"}),
+        ("no_such_tool", {}),
+    ])
+    def test_validate_rejects_invalid_arguments(self, name, args):
+        """Test missing, mistyped and unknown-tool arguments raise ValueError"""
+        with pytest.raises(ValueError):
+            validate(name, args)
+    
+    def test_basic_validator_without_fastjsonschema(self):
+        """Test the fallback validator checks required keys and types"""
+        validator = _compile_basic(get_tool_by_name("get_logcat").input_schema)
+        
+        validator({"lines": 100})
+        with pytest.raises(ValueError):
+            validator({"lines": True})
+        with pytest.raises(ValueError):
+            validator([])